@@ -4,10 +4,12 @@ import win32gui
 import win32con
 import win32api  # Added missing import
 import pywintypes  # For Windows-specific exceptions
+import hashlib
 import logging
 import time
 from typing import Optional, Callable, Any
 import threading
+from .tracing import Tracer
 
 # List of RDP-related process names to monitor
 RDP_PROCESSES = {
@@ -18,18 +20,26 @@ RDP_PROCESSES = {
     'rdpclip.exe',   # RDP Clipboard Monitor
 }
 
+def content_fingerprint(content: str) -> bytes:
+    """Return a compact digest of clipboard content, so we don't have to keep the payload around."""
+    return hashlib.blake2b(content.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
 class ClipboardMonitor:
-    def __init__(self, on_rdp_clipboard_update: Optional[Callable[[str], None]] = None):
+    def __init__(self, on_rdp_clipboard_update: Optional[Callable[[str, bytes], None]] = None,
+                 tracer: Optional[Tracer] = None):
         """
         Initialize the clipboard monitor.
         
         Args:
-            on_rdp_clipboard_update: Callback function that will be called when
-                                   clipboard content is updated by an RDP process.
+            on_rdp_clipboard_update: Callback function that will be called with the
+                                   content and its fingerprint when clipboard content
+                                   is updated by an RDP process.
+            tracer: Optional tracer that records per-event stage timings
         """
         self.logger = logging.getLogger(__name__)
         self.on_rdp_clipboard_update = on_rdp_clipboard_update
-        self.last_clipboard_content = ""
+        self.tracer = tracer or Tracer(enabled=False)
+        self.last_clipboard_fingerprint = None
         self.running = False
         self.thread = None
         self.enabled = True
@@ -57,10 +67,12 @@ class ClipboardMonitor:
         """Get the process name from a window handle."""
         try:
             _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            process = win32process.GetModuleFileNameEx(
-                win32api.OpenProcess(win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ, False, pid),
-                None
-            )
+            handle = win32api.OpenProcess(win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ, False, pid)
+            try:
+                process = win32process.GetModuleFileNameEx(handle, None)
+            finally:
+                # Close the handle right away rather than waiting for garbage collection
+                win32api.CloseHandle(handle)
             return process.split('\\')[-1].lower()
         except Exception as e:
             self.logger.debug(f"Could not get process name: {e}")
@@ -75,15 +87,66 @@ class ClipboardMonitor:
             self.logger.debug(f"Could not get foreground window process: {e}")
             return None
 
+    def _process_clipboard_change(self, content: str, get_process_name: Callable[[], Optional[str]],
+                                  event_id: Optional[int] = None):
+        """
+        Handle new clipboard content read after a sequence number change.
+        
+        Args:
+            content: The clipboard text
+            get_process_name: Returns the name of the process to attribute the change to.
+                              Only called if the content actually changed.
+            event_id: Trace event ID, or None if tracing is off
+        """
+        started = self.tracer.clock()
+        fingerprint = content_fingerprint(content)
+        started = self.tracer.span(event_id, 'fingerprint', started)
+        if fingerprint == self.last_clipboard_fingerprint:
+            self.logger.debug("Clipboard content hasn't changed")
+            return
+        
+        self.last_clipboard_fingerprint = fingerprint
+        
+        # Get the process that owns the foreground window
+        process_name = get_process_name()
+        started = self.tracer.span(event_id, 'process_lookup', started)
+        
+        if process_name and process_name.lower() in RDP_PROCESSES:
+            self.logger.debug(f"Clipboard updated by RDP process: {process_name}")
+            
+            if self.on_rdp_clipboard_update:
+                # Let the callback add its own spans to this event
+                self.tracer.set_current(event_id)
+                try:
+                    self.on_rdp_clipboard_update(content, fingerprint)
+                except Exception as e:
+                    self.logger.error(f"Error in clipboard update callback: {e}")
+                finally:
+                    self.tracer.set_current(None)
+                self.tracer.span(event_id, 'callback', started)
+        else:
+            self.logger.debug(f"Clipboard updated by non-RDP process: {process_name}")
+
+    def _handle_sequence_change(self, event_id: Optional[int] = None):
+        """Read and process the clipboard content after a sequence number change."""
+        started = self.tracer.clock()
+        content = self._get_clipboard_content()
+        self.tracer.span(event_id, 'content_read', started)
+        if content is not None:
+            self._process_clipboard_change(content, self._get_foreground_window_process, event_id)
+
     def _monitor_clipboard(self):
         """Monitor clipboard for changes in a loop."""
         self.logger.info("Clipboard monitor started")
         last_sequence = 0
         consecutive_errors = 0
         max_consecutive_errors = 5
+        sleep_started = 0  # When the previous poll went to sleep, for tracing
         
         while self.running:
             try:
+                poll_started = self.tracer.clock()
+                
                 # Get the current clipboard sequence number with retry logic
                 current_sequence = None
                 for attempt in range(3):  # Try up to 3 times
@@ -108,28 +171,17 @@ class ClipboardMonitor:
                 # Check if clipboard content has changed
                 if current_sequence != last_sequence and self.enabled:
                     last_sequence = current_sequence
-                    content = self._get_clipboard_content()
-                    
-                    if content is not None and content != self.last_clipboard_content:
-                        # Get the process that owns the foreground window
-                        process_name = self._get_foreground_window_process()
-                        
-                        if process_name and process_name.lower() in RDP_PROCESSES:
-                            self.logger.debug(f"Clipboard updated by RDP process: {process_name}")
-                            self.last_clipboard_content = content
-                            
-                            if self.on_rdp_clipboard_update:
-                                try:
-                                    self.on_rdp_clipboard_update(content)
-                                except Exception as e:
-                                    self.logger.error(f"Error in clipboard update callback: {e}")
-                        else:
-                            self.logger.debug(f"Clipboard updated by non-RDP process: {process_name}")
-                            self.last_clipboard_content = content
-                    elif content is not None:
-                        self.logger.debug("Clipboard content hasn't changed")
+                    event_id = self.tracer.new_event()
+                    if event_id is not None:
+                        # The change happened at some point while we were asleep
+                        if sleep_started:
+                            self.tracer.record(event_id, 'poll_wait', sleep_started, poll_started)
+                        self.tracer.span(event_id, 'clipboard_lock', poll_started)
+                    self._handle_sequence_change(event_id)
+                    self.tracer.span(event_id, 'clipboard_event', poll_started)
                 
                 # Small delay to prevent high CPU usage
+                sleep_started = self.tracer.clock()
                 time.sleep(0.1)
                 
             except pywintypes.error as e:
@@ -161,7 +213,7 @@ class ClipboardMonitor:
             return
             
         self.running = True
-        self.thread = threading.Thread(target=self._monitor_clipboard, daemon=True)
+        self.thread = threading.Thread(target=self._monitor_clipboard, name="clipboard-monitor", daemon=True)
         self.thread.start()
         self.logger.info("Clipboard monitor started")
 
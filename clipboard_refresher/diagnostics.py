@@ -0,0 +1,222 @@
+import ctypes
+import logging
+import threading
+import tracemalloc
+from typing import Optional, Callable, Dict, Any
+
+# Allocations from these files are bookkeeping, not application growth
+IGNORED_TRACES = (
+    tracemalloc.__file__,
+    '<frozen importlib._bootstrap>',
+    '<frozen importlib._bootstrap_external>',
+    '<unknown>',
+)
+
+def get_handle_count() -> Optional[int]:
+    """Return the number of open handles in this process, or None if unavailable."""
+    try:
+        kernel32 = ctypes.windll.kernel32
+        count = ctypes.c_ulong()
+        if kernel32.GetProcessHandleCount(kernel32.GetCurrentProcess(), ctypes.byref(count)):
+            return count.value
+    except Exception:
+        pass
+    return None
+
+class MemoryDiagnostics:
+    def __init__(self, interval: float = 300.0, growth_threshold: int = 10 * 1024 * 1024,
+                 handle_threshold: int = 500, thread_threshold: int = 10, top_n: int = 10,
+                 frames: int = 1, on_alert: Optional[Callable[[str], None]] = None):
+        """
+        Initialize the memory diagnostics.
+
+        Periodically takes tracemalloc snapshots, diffs them by allocation site
+        and compares traced memory, handle and thread counts against the
+        baseline taken at start. Each sample logs the sites that grew since
+        the previous sample; alerts name the sites that grew since the baseline.
+
+        Args:
+            interval: Seconds between samples
+            growth_threshold: Traced memory growth in bytes over the baseline that raises an alert
+            handle_threshold: Handle count growth over the baseline that raises an alert
+            thread_threshold: Thread count growth over the baseline that raises an alert
+            top_n: Number of allocation sites reported per sample
+            frames: Number of stack frames tracemalloc records per allocation
+            on_alert: Callback function that will be called with the alert message
+        """
+        self.logger = logging.getLogger(__name__)
+        self.interval = interval
+        self.growth_threshold = growth_threshold
+        self.handle_threshold = handle_threshold
+        self.thread_threshold = thread_threshold
+        self.top_n = top_n
+        self.frames = frames
+        self.on_alert = on_alert
+        self.running = False
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.started_tracing = False
+
+        self.baseline = None
+        self.baseline_snapshot = None
+        self.previous_snapshot = None
+        self.last_sample = None
+        self.samples = 0
+        self.alerts = 0
+        # Alerts re-arm once growth crosses the next multiple of the threshold
+        self.next_memory_alert = growth_threshold
+        self.next_handle_alert = handle_threshold
+        self.next_thread_alert = thread_threshold
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        """Take a tracemalloc snapshot without our own bookkeeping allocations."""
+        snapshot = tracemalloc.take_snapshot()
+        return snapshot.filter_traces([tracemalloc.Filter(False, name) for name in IGNORED_TRACES])
+
+    def reset_baseline(self):
+        """Take a new baseline that growth is measured against."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.started_tracing = True
+
+        self.baseline_snapshot = self._take_snapshot()
+        self.previous_snapshot = self.baseline_snapshot
+        self.baseline = {
+            'traced': tracemalloc.get_traced_memory()[0],
+            'handles': get_handle_count(),
+            'threads': threading.active_count(),
+        }
+        self.next_memory_alert = self.growth_threshold
+        self.next_handle_alert = self.handle_threshold
+        self.next_thread_alert = self.thread_threshold
+
+    def take_sample(self) -> Dict[str, Any]:
+        """
+        Take a sample, log the fastest-growing allocation sites and raise
+        an alert if growth crosses a threshold.
+
+        Returns:
+            The sample, with growth measured against the baseline
+        """
+        if self.baseline is None:
+            self.reset_baseline()
+
+        snapshot = self._take_snapshot()
+        top_stats = snapshot.compare_to(self.previous_snapshot, 'lineno')[:self.top_n]
+        baseline_stats = snapshot.compare_to(self.baseline_snapshot, 'lineno')[:self.top_n]
+        # Only keep the baseline and latest snapshots so diagnostics don't grow themselves
+        self.previous_snapshot = snapshot
+
+        traced, peak = tracemalloc.get_traced_memory()
+        handles = get_handle_count()
+        threads = threading.active_count()
+        handle_growth = None
+        if handles is not None and self.baseline['handles'] is not None:
+            handle_growth = handles - self.baseline['handles']
+
+        sample = {
+            'traced': traced,
+            'peak': peak,
+            'memory_growth': traced - self.baseline['traced'],
+            'handles': handles,
+            'handle_growth': handle_growth,
+            'threads': threads,
+            'thread_growth': threads - self.baseline['threads'],
+            'top_sites': [
+                (str(stat.traceback), stat.size_diff, stat.count_diff)
+                for stat in top_stats
+            ],
+            'growth_sites': [
+                (str(stat.traceback), stat.size_diff, stat.count_diff)
+                for stat in baseline_stats
+            ],
+        }
+        self.samples += 1
+        self.last_sample = sample
+
+        self.logger.debug(
+            f"Diagnostics sample: traced={traced} growth={sample['memory_growth']} "
+            f"handles={handles} threads={threads}"
+        )
+        for site, size_diff, count_diff in sample['top_sites']:
+            self.logger.debug(f"  {site}: {size_diff:+d} bytes, {count_diff:+d} blocks")
+
+        self._check_thresholds(sample)
+        return sample
+
+    def _check_thresholds(self, sample: Dict[str, Any]):
+        """Raise an alert for each measurement that crossed its threshold."""
+        messages = []
+
+        if sample['memory_growth'] >= self.next_memory_alert:
+            sites = ', '.join(f"{site} ({size_diff:+d} B)" for site, size_diff, _ in sample['growth_sites'][:3])
+            messages.append(
+                f"Memory grew by {sample['memory_growth'] / 1024 / 1024:.1f} MB since baseline. "
+                f"Top growing sites: {sites}"
+            )
+            while self.next_memory_alert <= sample['memory_growth']:
+                self.next_memory_alert += self.growth_threshold
+
+        if sample['handle_growth'] is not None and sample['handle_growth'] >= self.next_handle_alert:
+            messages.append(f"Handle count grew by {sample['handle_growth']} since baseline ({sample['handles']} open)")
+            while self.next_handle_alert <= sample['handle_growth']:
+                self.next_handle_alert += self.handle_threshold
+
+        if sample['thread_growth'] >= self.next_thread_alert:
+            messages.append(f"Thread count grew by {sample['thread_growth']} since baseline ({sample['threads']} running)")
+            while self.next_thread_alert <= sample['thread_growth']:
+                self.next_thread_alert += self.thread_threshold
+
+        for message in messages:
+            self.alerts += 1
+            self.logger.warning(message)
+            if self.on_alert:
+                try:
+                    self.on_alert(message)
+                except Exception as e:
+                    self.logger.error(f"Error in diagnostics alert callback: {e}")
+
+    def _run(self):
+        """Take samples until stopped."""
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.take_sample()
+            except Exception as e:
+                self.logger.error(f"Error taking diagnostics sample: {e}")
+
+    def start(self):
+        """Start tracing and the sampling thread."""
+        if self.running:
+            return
+
+        self.running = True
+        self.stop_event.clear()
+        self.reset_baseline()
+        self.thread = threading.Thread(target=self._run, name="diagnostics", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Memory diagnostics started (sampling every {self.interval:.0f}s)")
+
+    def stop(self):
+        """Stop the sampling thread and tracing, if we started it."""
+        self.running = False
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+        self.baseline_snapshot = None
+        self.previous_snapshot = None
+        self.logger.info("Memory diagnostics stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the latest sample and alert counters."""
+        sample = self.last_sample or {}
+        return {
+            'samples': self.samples,
+            'alerts': self.alerts,
+            'traced': sample.get('traced'),
+            'memory_growth': sample.get('memory_growth'),
+            'handles': sample.get('handles'),
+            'threads': sample.get('threads'),
+        }
@@ -0,0 +1,210 @@
+import win32api
+import win32file
+import win32security
+import ntsecuritycon
+import pywintypes  # For Windows-specific exceptions
+import winerror
+import hashlib
+import logging
+import mmap
+import msvcrt
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Optional, Dict, Any
+from .single_instance import get_session_id
+
+MAGIC = b'CRFC'
+VERSION = 3
+
+# Header: magic, version, number of sets, slots per set, then the secret key
+# that slot fingerprints are hashed with
+HEADER = struct.Struct('<4sIII32s')
+HEADER_SIZE = 64
+KEY_OFFSET = 16
+KEY_SIZE = 32
+
+# Slot: keyed content fingerprint, session that processed it, expiry time,
+# then a checksum of those three. Slots are written without a cross-process
+# lock, so a torn write simply fails the checksum and reads as a miss.
+SLOT_BODY = struct.Struct('<16sId')
+SLOT = struct.Struct('<16sIdQ')
+
+def _current_user_sid():
+    """Get the SID of the user this process runs as."""
+    token = win32security.OpenProcessToken(win32api.GetCurrentProcess(), win32security.TOKEN_QUERY)
+    try:
+        return win32security.GetTokenInformation(token, win32security.TokenUser)[0]
+    finally:
+        token.Close()
+
+def _private_security_attributes(directory: bool) -> pywintypes.SECURITY_ATTRIBUTES:
+    """
+    Build security attributes that give the current user, and nobody else,
+    access to the cache, instead of inheriting whatever the parent allows.
+    """
+    inherit = win32security.OBJECT_INHERIT_ACE | win32security.CONTAINER_INHERIT_ACE if directory else 0
+    dacl = win32security.ACL()
+    dacl.AddAccessAllowedAceEx(win32security.ACL_REVISION, inherit, ntsecuritycon.FILE_ALL_ACCESS, _current_user_sid())
+
+    descriptor = win32security.SECURITY_DESCRIPTOR()
+    descriptor.SetSecurityDescriptorDacl(1, dacl, 0)
+    # Don't inherit entries from the parent directory
+    descriptor.SetSecurityDescriptorControl(win32security.SE_DACL_PROTECTED, win32security.SE_DACL_PROTECTED)
+
+    attributes = pywintypes.SECURITY_ATTRIBUTES()
+    attributes.SECURITY_DESCRIPTOR = descriptor
+    return attributes
+
+class FingerprintCache:
+    def __init__(self, path: Optional[str] = None, sets: int = 4096, ways: int = 4, ttl: float = 60.0):
+        """
+        Initialize the fingerprint cache.
+
+        The cache records the fingerprints of clipboard content recently
+        processed by an instance in another session of the same user, so that
+        when rdpclip syncs the same payload into several of that user's
+        sessions only the first one logs and publishes it. It is a
+        set-associative table of fixed-size slots in a memory-mapped file;
+        a lookup is a single read of one set.
+
+        The backing file belongs to one user: only that user can open it, so
+        another user's entries can never suppress this session's events. It
+        is deleted when the last instance using it closes. Fingerprints are
+        re-hashed with a random key kept in the file header, so the slots
+        can't be matched against guessed content without that key.
+
+        Args:
+            path: Path of the backing file, which must be in a directory
+                  private to the user. If None, or if the file can't be used,
+                  the cache is private to this process.
+            sets: Number of sets in the table
+            ways: Number of slots per set
+            ttl: Seconds an entry stays valid
+        """
+        self.logger = logging.getLogger(__name__)
+        self.sets = sets
+        self.ways = ways
+        self.ttl = ttl
+        self.size = HEADER_SIZE + sets * ways * SLOT.size
+        self.session_id = get_session_id()
+        self.lock = threading.Lock()
+        self.shared = False
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+
+        self.map = None
+        if path:
+            try:
+                self.map = self._open_shared(path)
+                self.shared = True
+            except Exception as e:
+                self.logger.warning(f"Could not open shared fingerprint cache {path}, using a private one: {e}")
+        if self.map is None:
+            self.map = mmap.mmap(-1, self.size)
+            HEADER.pack_into(self.map, 0, MAGIC, VERSION, self.sets, self.ways, os.urandom(KEY_SIZE))
+
+    def _open_shared(self, path: str) -> mmap.mmap:
+        """Map the backing file, creating it with private permissions if needed."""
+        directory = os.path.dirname(os.path.abspath(path))
+        try:
+            win32file.CreateDirectory(directory, _private_security_attributes(directory=True))
+        except pywintypes.error as e:
+            if e.winerror != winerror.ERROR_ALREADY_EXISTS:
+                raise
+
+        # Deleted once the last instance closes it, so fingerprints never outlive the processes
+        handle = win32file.CreateFile(
+            path,
+            win32file.GENERIC_READ | win32file.GENERIC_WRITE,
+            win32file.FILE_SHARE_READ | win32file.FILE_SHARE_WRITE | win32file.FILE_SHARE_DELETE,
+            _private_security_attributes(directory=False),
+            win32file.OPEN_ALWAYS,
+            win32file.FILE_ATTRIBUTE_TEMPORARY | win32file.FILE_FLAG_DELETE_ON_CLOSE,
+            None
+        )
+        fd = msvcrt.open_osfhandle(handle.Detach(), os.O_RDWR)
+        try:
+            if os.fstat(fd).st_size < self.size:
+                os.ftruncate(fd, self.size)
+            shared_map = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+
+        magic, version, sets, ways, _ = HEADER.unpack_from(shared_map, 0)
+        if magic == b'\0\0\0\0':
+            # Freshly created file. If two instances race here, the last key
+            # written wins; lookups always read the key from the header.
+            HEADER.pack_into(shared_map, 0, MAGIC, VERSION, self.sets, self.ways, os.urandom(KEY_SIZE))
+        elif (magic, version, sets, ways) != (MAGIC, VERSION, self.sets, self.ways):
+            shared_map.close()
+            raise ValueError("cache file has an incompatible layout")
+        return shared_map
+
+    def _set_offset(self, fingerprint: bytes) -> int:
+        return HEADER_SIZE + (int.from_bytes(fingerprint[:8], 'little') % self.sets) * self.ways * SLOT.size
+
+    def _read_set(self, offset: int):
+        """Read one set and yield (slot offset, fingerprint, session, expiry) for each valid slot."""
+        data = self.map[offset:offset + self.ways * SLOT.size]
+        for i, (fingerprint, session_id, expiry, checksum) in enumerate(SLOT.iter_unpack(data)):
+            if zlib.crc32(data[i * SLOT.size:i * SLOT.size + SLOT_BODY.size]) == checksum:
+                yield offset + i * SLOT.size, fingerprint, session_id, expiry
+
+    def check_and_add(self, fingerprint: bytes) -> bool:
+        """
+        Check whether another session processed this content recently, and
+        record it as processed by this session if not.
+
+        Args:
+            fingerprint: Content fingerprint, as computed by the clipboard monitor
+
+        Returns:
+            True if a live entry from another session exists.
+        """
+        now = time.time()
+        key = self.map[KEY_OFFSET:KEY_OFFSET + KEY_SIZE]
+        fingerprint = hashlib.blake2b(fingerprint, key=key, digest_size=16).digest()
+        offset = self._set_offset(fingerprint)
+        with self.lock:
+            slots = list(self._read_set(offset))
+            target = None
+            for slot_offset, slot_fingerprint, session_id, expiry in slots:
+                if slot_fingerprint == fingerprint and expiry > now:
+                    if session_id != self.session_id:
+                        self.hits += 1
+                        return True
+                    # Our own earlier copy; refresh it
+                    target = slot_offset
+                    break
+            self.misses += 1
+
+            if target is None:
+                # Prefer empty, torn or expired slots, then the one expiring soonest
+                live = {slot_offset: expiry for slot_offset, _, _, expiry in slots if expiry > now}
+                candidates = [offset + i * SLOT.size for i in range(self.ways)]
+                target = min(candidates, key=lambda o: live.get(o, 0.0))
+
+            body = SLOT_BODY.pack(fingerprint, self.session_id, now + self.ttl)
+            self.map[target:target + SLOT.size] = body + struct.pack('<Q', zlib.crc32(body))
+            self.puts += 1
+            return False
+
+    def close(self):
+        """Unmap the cache."""
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return lookup counters."""
+        with self.lock:
+            return {
+                'shared': self.shared,
+                'hits': self.hits,
+                'misses': self.misses,
+                'puts': self.puts,
+            }
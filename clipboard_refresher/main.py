@@ -1,23 +1,58 @@
 import sys
 import os
 import logging
+import logging.handlers
 import ctypes
 import time
+import argparse
 from typing import Optional
 from .clipboard_monitor import ClipboardMonitor
 from .tray_icon import TrayIcon
+from .sinks import SinkDispatcher, FileSpoolSink, NamedPipeSink, AuditLogSink, DROP_NEWEST
+from .redaction import Redactor
+from .diagnostics import MemoryDiagnostics
+from .single_instance import SingleInstance, get_session_id
+from .fingerprint_cache import FingerprintCache
+from .tracing import Tracer
+
+# Name of the pipe served by the clipboard-history service
+HISTORY_PIPE_NAME = 'clipboard_history'
+
+# Additional regular expressions to redact on top of the built-in secret patterns
+CUSTOM_REDACTION_PATTERNS = []
+
+# Size of the log file before it is rotated, and how many old log files are kept
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+def get_app_dir() -> str:
+    """Get the directory where the executable or script is located."""
+    if getattr(sys, 'frozen', False):
+        # Running as compiled executable
+        return os.path.dirname(sys.executable)
+    # Running as script
+    return os.path.dirname(os.path.abspath(__file__))
+
+def get_user_dir() -> str:
+    """Get a directory private to the current user, shared by their sessions on this host."""
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.clipboard_refresher')
+    return os.path.join(base, 'ClipboardRefresher')
+
+def get_session_dir() -> str:
+    """
+    Get a directory private to the current user and session, for files that
+    only this instance writes. Other users and this user's other sessions on
+    the same host each get their own.
+    """
+    return os.path.join(get_user_dir(), f'session-{get_session_id()}')
 
 # Configure logging
 def setup_logging():
     """Configure logging to both file and console."""
     try:
-        # Get the directory where the executable or script is located
-        if getattr(sys, 'frozen', False):
-            # Running as compiled executable
-            log_dir = os.path.dirname(sys.executable)
-        else:
-            # Running as script
-            log_dir = os.path.dirname(os.path.abspath(__file__))
+        # Per user and session: rotation renames the file, which fails while
+        # an instance in another session holds it open
+        log_dir = get_session_dir()
             
         log_file = os.path.join(log_dir, 'clipboard_refresher.log')
         os.makedirs(log_dir, exist_ok=True)
@@ -26,8 +61,10 @@ def setup_logging():
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.INFO)
         
-        # Create a file handler
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        # Create a rotating file handler so the log can't grow without limit
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
         file_handler.setLevel(logging.DEBUG)
         
         # Create formatters and add it to the handlers
@@ -56,46 +93,153 @@ def setup_logging():
         raise
 
 class ClipboardRefresher:
-    def __init__(self):
+    def __init__(self, diagnostics: bool = False, trace: bool = False):
+        """
+        Initialize the application.
+        
+        Args:
+            diagnostics: Enable the memory diagnostics mode for long-running soak testing
+            trace: Record per-event latency spans that can be dumped from the tray menu
+        """
         self.logger = logging.getLogger(__name__)
         self.clipboard_monitor = None
         self.tray_icon = None
+        self.sink_dispatcher = None
+        self.redactor = Redactor(custom_patterns=CUSTOM_REDACTION_PATTERNS)
+        self.diagnostics = MemoryDiagnostics(on_alert=self.on_diagnostics_alert) if diagnostics else None
+        self.single_instance = SingleInstance()
+        self.fingerprint_cache = None
+        self.tracer = Tracer(enabled=trace)
         self.running = False
 
-    def on_clipboard_update(self, content: str):
+    def _create_sink_dispatcher(self) -> SinkDispatcher:
+        """Create the sinks that RDP clipboard events are forwarded to."""
+        # Per-session files, so instances in other sessions never append to or rotate them
+        session_dir = get_session_dir()
+        return SinkDispatcher([
+            FileSpoolSink(os.path.join(session_dir, 'spool', 'clipboard_spool.jsonl')),
+            NamedPipeSink(HISTORY_PIPE_NAME, drop_policy=DROP_NEWEST),
+            AuditLogSink(os.path.join(session_dir, 'clipboard_audit.log')),
+        ], redactor=self.redactor)
+
+    def on_clipboard_update(self, content: str, fingerprint: bytes):
         """Handle clipboard updates from RDP processes."""
+        event_id = self.tracer.get_current()
+        started = self.tracer.clock()
         try:
-            self.logger.info(f"Processing RDP clipboard content: {content[:100]}...")
+            # Skip logging and publishing if another of this user's sessions already handled this payload
+            duplicate = False
+            if self.fingerprint_cache:
+                duplicate = self.fingerprint_cache.check_and_add(fingerprint)
+                started = self.tracer.span(event_id, 'cache_lookup', started)
             
-            # Log the original content
-            self.tray_icon.log(f"RDP clipboard content: {content[:200]}...")
+            if duplicate:
+                self.logger.debug("RDP clipboard content already processed by another of your sessions")
+                self.tray_icon.log("RDP clipboard content (already processed by another of your sessions)")
+                started = self.tracer.span(event_id, 'tray_log', started)
+            else:
+                started = self._log_and_publish(content, event_id, started)
             
-            # Re-copy the content back to the clipboard to ensure it's available to clipboard history
-            import win32clipboard
-            import win32con
-            
-            try:
-                win32clipboard.OpenClipboard()
-                win32clipboard.EmptyClipboard()
-                win32clipboard.SetClipboardText(content, win32con.CF_UNICODETEXT)
-                win32clipboard.CloseClipboard()
-                self.logger.debug("Successfully updated clipboard with processed content")
-            except Exception as e:
-                self.logger.error(f"Failed to update clipboard: {e}")
-                # Try to close clipboard if it's still open
-                try:
-                    win32clipboard.CloseClipboard()
-                except:
-                    pass
+            # Re-copy the content back to the clipboard to ensure it's available to this session's clipboard history
+            self._recopy_to_clipboard(content)
+            self.tracer.span(event_id, 'recopy', started)
             
         except Exception as e:
             self.logger.error(f"Error processing clipboard content: {e}")
 
+    def _log_and_publish(self, content: str, event_id: Optional[int], started: int) -> int:
+        """Log redacted previews of the content and forward it to the sinks."""
+        # Only redacted previews are logged; the sinks redact the full content on their own threads
+        self.logger.info(f"Processing RDP clipboard content: {self.redactor.preview(content, 100)}...")
+        started = self.tracer.span(event_id, 'redact_log', started)
+        
+        # Log the redacted content
+        self.tray_icon.log(f"RDP clipboard content: {self.redactor.preview(content, 200)}...")
+        started = self.tracer.span(event_id, 'tray_log', started)
+        
+        # Forward the event to the sinks; this never blocks on a slow sink
+        if self.sink_dispatcher:
+            self.sink_dispatcher.publish({'timestamp': time.time(), 'content': content})
+            started = self.tracer.span(event_id, 'sink_publish', started)
+        
+        return started
+
+    def _recopy_to_clipboard(self, content: str):
+        """Put the content back on the clipboard so it's picked up by clipboard history."""
+        import win32clipboard
+        import win32con
+        
+        try:
+            win32clipboard.OpenClipboard()
+            win32clipboard.EmptyClipboard()
+            win32clipboard.SetClipboardText(content, win32con.CF_UNICODETEXT)
+            win32clipboard.CloseClipboard()
+            self.logger.debug("Successfully updated clipboard with processed content")
+        except Exception as e:
+            self.logger.error(f"Failed to update clipboard: {e}")
+            # Try to close clipboard if it's still open
+            try:
+                win32clipboard.CloseClipboard()
+            except:
+                pass
+
     def on_toggle_monitoring(self, enabled: bool):
         """Handle monitoring toggle from the tray icon."""
         if self.clipboard_monitor:
             self.clipboard_monitor.set_enabled(enabled)
 
+    def on_show_stats(self):
+        """Write runtime statistics to the tray log."""
+        if self.sink_dispatcher:
+            for name, stats in self.sink_dispatcher.get_stats().items():
+                self.tray_icon.log(
+                    f"Sink '{name}': written={stats['written']} dropped={stats['dropped']} "
+                    f"failed={stats['failed']} queued={stats['queued']} "
+                    f"rate={stats['events_per_sec']:.2f}/s"
+                )
+
+        stats = self.redactor.get_stats()
+        matches = ', '.join(f"{category}={count}" for category, count in stats['matches'].items()) or 'none'
+        self.tray_icon.log(
+            f"Redaction: scans={stats['scans']} chars={stats['chars_scanned']} "
+            f"avg={stats['avg_scan_time'] * 1000:.2f}ms max={stats['max_scan_time'] * 1000:.2f}ms "
+            f"matches: {matches}"
+        )
+
+        if self.fingerprint_cache:
+            stats = self.fingerprint_cache.get_stats()
+            self.tray_icon.log(
+                f"Fingerprint cache: shared={stats['shared']} hits={stats['hits']} "
+                f"misses={stats['misses']} puts={stats['puts']}"
+            )
+
+        if self.diagnostics:
+            stats = self.diagnostics.get_stats()
+            if stats['samples'] == 0:
+                self.tray_icon.log(
+                    f"Diagnostics: no samples yet (first sample after {self.diagnostics.interval:.0f}s)"
+                )
+            else:
+                self.tray_icon.log(
+                    f"Diagnostics: samples={stats['samples']} alerts={stats['alerts']} "
+                    f"traced={stats['traced']} growth={stats['memory_growth']} "
+                    f"handles={stats['handles']} threads={stats['threads']}"
+                )
+
+    def on_dump_trace(self):
+        """Write the recorded trace spans to a Chrome trace-event JSON file."""
+        path = os.path.join(get_app_dir(), 'clipboard_refresher_trace.json')
+        try:
+            count = self.tracer.dump(path)
+            self.tray_icon.log(f"Wrote {count} trace spans to {path}")
+        except Exception as e:
+            self.tray_icon.log(f"Failed to write trace: {e}", level="ERROR")
+
+    def on_diagnostics_alert(self, message: str):
+        """Surface a diagnostics alert in the tray log."""
+        if self.tray_icon:
+            self.tray_icon.log(f"Diagnostics alert: {message}", level="WARNING")
+
     def on_quit(self):
         """Handle application quit."""
         self.logger.info("Shutdown requested by user")
@@ -108,12 +252,30 @@ class ClipboardRefresher:
                 self.clipboard_monitor.stop()
                 self.clipboard_monitor = None
             
+            # Stop the memory diagnostics
+            if self.diagnostics:
+                self.diagnostics.stop()
+                self.diagnostics = None
+            
+            # Release the shared fingerprint cache
+            if self.fingerprint_cache:
+                self.fingerprint_cache.close()
+                self.fingerprint_cache = None
+            
+            # Stop the sinks, flushing any queued events
+            if self.sink_dispatcher:
+                self.logger.debug("Stopping sinks...")
+                self.sink_dispatcher.stop()
+                self.sink_dispatcher = None
+            
             # Stop the tray icon
             if self.tray_icon:
                 self.logger.debug("Stopping tray icon...")
                 self.tray_icon.stop()
                 self.tray_icon = None
                 
+            self.single_instance.release()
+            
             self.logger.info("Shutdown complete")
             
         except Exception as e:
@@ -128,17 +290,35 @@ class ClipboardRefresher:
         self.running = True
         
         try:
+            # Only one instance per session; a second copy exits before opening the log
+            if not self.single_instance.acquire():
+                print("Clipboard Refresher is already running in this session, exiting")
+                self.running = False
+                return
+            
             # Setup logging
             setup_logging()
             self.logger.info("Starting Clipboard Refresher")
             
+            # Initialize and start the event sinks
+            self.sink_dispatcher = self._create_sink_dispatcher()
+            self.sink_dispatcher.start()
+            
+            # Open the fingerprint cache shared with this user's instances in other sessions
+            self.fingerprint_cache = FingerprintCache(os.path.join(get_user_dir(), 'fingerprints.cache'))
+            
             # Initialize clipboard monitor
-            self.clipboard_monitor = ClipboardMonitor(on_rdp_clipboard_update=self.on_clipboard_update)
+            self.clipboard_monitor = ClipboardMonitor(
+                on_rdp_clipboard_update=self.on_clipboard_update,
+                tracer=self.tracer
+            )
             
             # Initialize tray icon
             self.tray_icon = TrayIcon(
                 on_quit=self.on_quit,
-                on_toggle=self.on_toggle_monitoring
+                on_toggle=self.on_toggle_monitoring,
+                on_show_stats=self.on_show_stats,
+                on_dump_trace=self.on_dump_trace if self.tracer.enabled else None
             )
             
             # Start tray icon in a separate thread
@@ -148,6 +328,10 @@ class ClipboardRefresher:
             
             self.logger.info("Application started successfully")
             
+            # Start memory diagnostics if requested
+            if self.diagnostics:
+                self.diagnostics.start()
+            
             # Start clipboard monitoring on the main thread
             self.clipboard_monitor.start()
             
@@ -174,6 +358,13 @@ def is_admin():
 
 def main():
     """Main entry point for the application."""
+    parser = argparse.ArgumentParser(description="Clipboard Refresher")
+    parser.add_argument('--diagnostics', action='store_true',
+                        help="Take periodic memory, handle and thread samples and alert on growth")
+    parser.add_argument('--trace', action='store_true',
+                        help="Record per-event latency spans, dumpable as Chrome trace JSON from the tray menu")
+    args = parser.parse_args()
+    
     try:
         print("Starting Clipboard Refresher...")
         
@@ -182,7 +373,7 @@ def main():
         
         # Create and run the application
         print("Initializing application...")
-        app = ClipboardRefresher()
+        app = ClipboardRefresher(diagnostics=args.diagnostics, trace=args.trace)
         print("Starting application...")
         app.run()
         
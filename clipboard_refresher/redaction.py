@@ -0,0 +1,182 @@
+import logging
+import re
+import threading
+import time
+from typing import Optional, Dict, List, Any, Iterable, Tuple
+
+# Built-in secret patterns as (category, regex) pairs. Every pattern must have
+# a bounded length so that a match never spans more than CHUNK_OVERLAP characters.
+SECRET_PATTERNS = [
+    # Only the BEGIN line; the scanner extends the match to the END line itself
+    ('private_key', r'-----BEGIN [A-Z ]{0,32}PRIVATE KEY-----'),
+    ('aws_access_key', r'\b(?:AKIA|ASIA)[0-9A-Z]{16}\b'),
+    ('github_token', r'\bgh[pousr]_[A-Za-z0-9]{36,255}\b'),
+    ('slack_token', r'\bxox[abprs]-[A-Za-z0-9-]{10,200}'),
+    ('jwt', r'\beyJ[A-Za-z0-9_-]{5,3000}\.eyJ[A-Za-z0-9_-]{5,3000}\.[A-Za-z0-9_-]{0,1000}'),
+    ('bearer_token', r'(?i:\bbearer\s{1,8}[A-Za-z0-9._~+/-]{16,4000}={0,2})'),
+    # Also matches prefixed names such as DB_PASSWORD or PGPASSWORD, quoted JSON keys
+    # such as "password": and quoted values up to the closing quote
+    ('password', r'(?i:(?<![A-Za-z0-9])[A-Za-z0-9_-]{0,64}?'
+                 r'(?:password|passwd|pwd|secret_access_key|client_secret|secret|api[_-]?key|access[_-]?token)'
+                 r'["\']?\s{0,8}[:=]\s{0,8}(?:"[^"]{0,512}"|\'[^\']{0,512}\'|\S{1,512}))'),
+    ('card_number', r'\b(?:\d[ -]?){12,18}\d\b'),
+]
+
+# End of a private key block, and how far past the BEGIN line it may start
+PRIVATE_KEY_END = re.compile(r'-----END [A-Z ]{0,32}PRIVATE KEY-----')
+PRIVATE_KEY_MAX_BODY = 8000
+
+# Characters scanned per chunk, and how far each chunk looks ahead so that
+# matches straddling a chunk boundary are still found
+CHUNK_SIZE = 64 * 1024
+CHUNK_OVERLAP = 8 * 1024
+
+def _luhn_valid(number: str) -> bool:
+    """Check a digit string against the Luhn checksum used by card numbers."""
+    digits = [int(c) for c in number if c.isdigit()]
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        if i % 2 == 1:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+class Redactor:
+    def __init__(self, custom_patterns: Optional[Iterable[str]] = None,
+                 chunk_size: int = CHUNK_SIZE, max_scan_chars: int = 10 * 1024 * 1024):
+        """
+        Initialize the redactor.
+
+        All patterns are compiled into a single alternation so each chunk is
+        scanned once regardless of how many patterns are configured.
+
+        Args:
+            custom_patterns: Additional regular expressions to redact. They must
+                             not use named groups and should have bounded length.
+            chunk_size: Number of characters scanned per chunk
+            max_scan_chars: Content beyond this many characters is withheld
+                            rather than scanned
+        """
+        self.logger = logging.getLogger(__name__)
+        self.chunk_size = chunk_size
+        self.max_scan_chars = max_scan_chars
+
+        patterns = list(SECRET_PATTERNS)
+        for i, pattern in enumerate(custom_patterns or []):
+            re.compile(pattern)  # Fail early with a clear error on bad input
+            patterns.append((f'custom_{i}', pattern))
+        self.categories = [category for category, _ in patterns]
+        self.pattern = re.compile('|'.join(f'(?P<{category}>{regex})' for category, regex in patterns))
+
+        self.stats_lock = threading.Lock()
+        self.scans = 0
+        self.chars_scanned = 0
+        self.scan_time = 0.0
+        self.max_scan_time = 0.0
+        self.matches = {category: 0 for category in self.categories}
+
+    def _scan(self, text: str) -> Tuple[List[str], Dict[str, int]]:
+        """Scan text chunk by chunk and return the redacted pieces and match counts."""
+        pieces = []
+        counts = {}
+        length = len(text)
+        pos = 0  # Everything before pos has been emitted
+
+        while pos < length:
+            chunk_end = min(pos + self.chunk_size, length)
+            window_end = min(chunk_end + CHUNK_OVERLAP, length)
+            last = pos
+            # The END line following the last BEGIN line, shared by later BEGIN
+            # lines so that headers without an END don't each rescan the window
+            key_end = None
+            key_end_searched = False
+
+            for match in self.pattern.finditer(text, pos, window_end):
+                # Matches starting in the look-ahead belong to the next chunk
+                if match.start() >= chunk_end:
+                    break
+                # Already covered by a private key block
+                if match.start() < last:
+                    continue
+                category = match.lastgroup
+                end = match.end()
+                if category == 'card_number' and not _luhn_valid(match.group()):
+                    continue
+                if category == 'private_key':
+                    if not key_end_searched or (key_end is not None and key_end.start() < end):
+                        key_end = PRIVATE_KEY_END.search(text, end, window_end)
+                        key_end_searched = True
+                    if key_end is None or key_end.start() - end > PRIVATE_KEY_MAX_BODY:
+                        continue
+                    end = key_end.end()
+                pieces.append(text[last:match.start()])
+                pieces.append(f'[REDACTED:{category}]')
+                counts[category] = counts.get(category, 0) + 1
+                last = end
+
+            # Resume after the chunk, or after a match that ran into the look-ahead
+            next_pos = max(chunk_end, last)
+            pieces.append(text[last:next_pos])
+            pos = next_pos
+
+        return pieces, counts
+
+    def redact(self, content: str, limit: Optional[int] = None) -> str:
+        """
+        Return content with sensitive values replaced by [REDACTED:<category>].
+
+        Args:
+            content: Text to redact
+            limit: Maximum number of characters to scan; defaults to max_scan_chars.
+                   Anything beyond it is replaced by a marker instead of being returned unscanned.
+        """
+        if not content:
+            return content
+
+        limit = self.max_scan_chars if limit is None else limit
+        start = time.perf_counter()
+        pieces, counts = self._scan(content[:limit])
+        if len(content) > limit:
+            pieces.append(f'[... {len(content) - limit} chars withheld]')
+        elapsed = time.perf_counter() - start
+
+        with self.stats_lock:
+            self.scans += 1
+            self.chars_scanned += min(len(content), limit)
+            self.scan_time += elapsed
+            self.max_scan_time = max(self.max_scan_time, elapsed)
+            for category, count in counts.items():
+                self.matches[category] += count
+
+        return ''.join(pieces)
+
+    def preview(self, content: str, length: int) -> str:
+        """
+        Return a redacted preview of about length characters. A redaction
+        marker at the cut-off is kept whole rather than truncated.
+
+        Only the start of the content plus enough look-ahead to catch a
+        secret crossing the cut-off is scanned, so the cost is independent
+        of the payload size.
+        """
+        redacted = self.redact(content[:length + CHUNK_OVERLAP], limit=length + CHUNK_OVERLAP)
+        end = length
+        # Don't cut a redaction marker in half
+        marker = redacted.rfind('[REDACTED:', 0, length + len('[REDACTED:') - 1)
+        if marker != -1:
+            end = max(end, redacted.find(']', marker) + 1)
+        return redacted[:end]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return scan time and match counters."""
+        with self.stats_lock:
+            return {
+                'scans': self.scans,
+                'chars_scanned': self.chars_scanned,
+                'scan_time': self.scan_time,
+                'max_scan_time': self.max_scan_time,
+                'avg_scan_time': self.scan_time / self.scans if self.scans else 0.0,
+                'matches': {category: count for category, count in self.matches.items() if count},
+            }
@@ -0,0 +1,57 @@
+import win32event
+import win32api
+import win32ts
+import winerror
+import logging
+import os
+
+def get_session_id() -> int:
+    """Get the ID of the session this process runs in, or 0 if it can't be determined."""
+    try:
+        return win32ts.ProcessIdToSessionId(os.getpid())
+    except Exception as e:
+        logging.getLogger(__name__).debug(f"Could not get session ID: {e}")
+        return 0
+
+class SingleInstance:
+    def __init__(self, name: str = 'ClipboardRefresher'):
+        """
+        Initialize the single-instance guard.
+
+        The guard is a named mutex in the session-local namespace, so only
+        one copy runs per session but each session on a host gets its own.
+
+        Args:
+            name: Name of the mutex
+        """
+        self.logger = logging.getLogger(__name__)
+        self.mutex_name = f"Local\\{name}"
+        self.mutex = None
+
+    def acquire(self) -> bool:
+        """
+        Try to become the only instance in this session.
+
+        Returns:
+            True if no other instance holds the mutex, False otherwise.
+        """
+        if self.mutex is not None:
+            return True
+
+        mutex = win32event.CreateMutex(None, False, self.mutex_name)
+        if win32api.GetLastError() == winerror.ERROR_ALREADY_EXISTS:
+            win32api.CloseHandle(mutex)
+            self.logger.warning("Another instance is already running in this session")
+            return False
+
+        self.mutex = mutex
+        return True
+
+    def release(self):
+        """Release the mutex so another instance can start."""
+        if self.mutex is not None:
+            try:
+                win32api.CloseHandle(self.mutex)
+            except Exception as e:
+                self.logger.error(f"Error releasing single-instance mutex: {e}")
+            self.mutex = None
@@ -0,0 +1,490 @@
+import win32file
+import pywintypes  # For Windows-specific exceptions
+import hashlib
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Optional, Dict, List, Any
+from .redaction import Redactor
+
+# Drop policies applied when a sink's queue is full
+DROP_NEWEST = 'drop_newest'  # Discard the incoming event
+DROP_OLDEST = 'drop_oldest'  # Discard the oldest queued event to make room
+
+class SinkUnavailable(Exception):
+    """Raised by write_batch when the sink's target is known to be down and the batch was skipped."""
+    pass
+
+class RedactedContent:
+    def __init__(self, content: str, redactor: Redactor):
+        """
+        Event content that is redacted on first use.
+
+        One instance is shared by every sink an event is published to, so
+        the payload is scanned once no matter how many sinks write it, and
+        on whichever sink thread gets there first.
+        """
+        self.size = sys.getsizeof(content)
+        self.content = content
+        self.redactor = redactor
+        self.redacted = None
+        self.lock = threading.Lock()
+
+    def get(self) -> str:
+        """Return the redacted content, redacting it if no sink has yet."""
+        with self.lock:
+            if self.redacted is None:
+                self.redacted = self.redactor.redact(self.content)
+                # The raw payload is no longer needed
+                self.content = None
+            return self.redacted
+
+class ClipboardSink:
+    def __init__(self, name: str, max_queue: int = 1000, batch_size: int = 50,
+                 flush_interval: float = 0.5, drop_policy: str = DROP_OLDEST,
+                 max_bytes: int = 64 * 1024 * 1024, min_retry: float = 1.0, max_retry: float = 60.0):
+        """
+        Initialize a clipboard event sink.
+
+        Each sink owns a bounded queue and a worker thread, so a slow sink
+        only ever fills (and drops from) its own queue. While a sink's target
+        is unavailable, it is retried with exponential backoff and batches in
+        between are skipped, so an outage costs one log line, not one per event.
+
+        Args:
+            name: Name used in logs and statistics
+            max_queue: Maximum number of events waiting to be written
+            batch_size: Maximum number of events handed to write_batch at once
+            flush_interval: Seconds to wait for more events before writing a partial batch
+            drop_policy: DROP_OLDEST or DROP_NEWEST, applied when the queue is full
+            max_bytes: Maximum memory held by queued event content; exceeding it
+                       drops events under the same policy as a full queue
+            min_retry: Seconds before the first retry of an unavailable target
+            max_retry: Upper bound on the seconds between retries
+        """
+        if drop_policy not in (DROP_NEWEST, DROP_OLDEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.max_bytes = max_bytes
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.queued_bytes = 0
+        self.min_retry = min_retry
+        self.max_retry = max_retry
+        self.retry_delay = min_retry
+        self.retry_at = 0.0
+        self.disconnected = False
+        self.running = False
+        self.thread = None
+        self.stats_lock = threading.Lock()
+        self.started_at = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def open(self):
+        """Acquire any resources needed by the sink. Called on the worker thread."""
+        pass
+
+    def close(self):
+        """Release resources held by the sink. Called on the worker thread."""
+        pass
+
+    def write_batch(self, events: List[Dict[str, Any]]):
+        """Write a batch of events. Must be implemented by subclasses."""
+        raise NotImplementedError
+
+    def _check_retry(self, target: str):
+        """Raise SinkUnavailable if the target is down and its next retry isn't due yet."""
+        if time.monotonic() < self.retry_at:
+            raise SinkUnavailable(f"{target} unavailable, retrying in {self.retry_at - time.monotonic():.1f}s")
+
+    def _unavailable(self, target: str, error: Exception):
+        """Schedule the next retry, report the outage once and raise SinkUnavailable."""
+        self.close()
+        if not self.disconnected:
+            self.logger.warning(f"Sink '{self.name}' lost {target}: {error}; events are dropped until it is back")
+            self.disconnected = True
+        self.retry_at = time.monotonic() + self.retry_delay
+        self.logger.debug(f"Sink '{self.name}' will retry {target} in {self.retry_delay:.1f}s")
+        self.retry_delay = min(self.retry_delay * 2, self.max_retry)
+        raise SinkUnavailable(str(error))
+
+    def _available(self, target: str):
+        """Reset the backoff after the target was reached."""
+        if self.disconnected:
+            self.logger.info(f"Sink '{self.name}' reconnected to {target}")
+        self.disconnected = False
+        self.retry_delay = self.min_retry
+
+    @staticmethod
+    def _event_size(event: Dict[str, Any]) -> int:
+        """Approximate memory held by an event, dominated by its content."""
+        content = event.get('content', '')
+        if isinstance(content, RedactedContent):
+            return content.size
+        return sys.getsizeof(content)
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        """
+        Queue an event without blocking.
+
+        Returns:
+            True if the event was queued, False if it was dropped.
+        """
+        size = self._event_size(event)
+        with self.stats_lock:
+            if size > self.max_bytes:
+                # Could never fit, whatever we evict
+                self.dropped += 1
+                return False
+
+            while self.queue.full() or self.queued_bytes + size > self.max_bytes:
+                if self.drop_policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+
+                # Make room by discarding the oldest event
+                try:
+                    oldest = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                self.queued_bytes -= self._event_size(oldest)
+                self.dropped += 1
+
+            try:
+                self.queue.put_nowait(event)
+            except queue.Full:
+                self.dropped += 1
+                return False
+            self.queued_bytes += size
+            self.enqueued += 1
+        return True
+
+    def _take(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Take an event off the queue, blocking for up to timeout if given."""
+        if timeout is None:
+            event = self.queue.get_nowait()
+        else:
+            event = self.queue.get(timeout=timeout)
+        with self.stats_lock:
+            self.queued_bytes -= self._event_size(event)
+        return event
+
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        """Block for the first event, then drain up to batch_size without blocking."""
+        try:
+            batch = [self._take(self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._take())
+            except queue.Empty:
+                break
+        return batch
+
+    def _resolve(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the event with shared redacted content replaced by its text."""
+        content = event.get('content')
+        if not isinstance(content, RedactedContent):
+            return event
+        resolved = dict(event)
+        resolved['content'] = content.get()
+        return resolved
+
+    def _flush(self, batch: List[Dict[str, Any]]):
+        """Write a batch and update the counters."""
+        try:
+            batch = [self._resolve(event) for event in batch]
+            self.write_batch(batch)
+            with self.stats_lock:
+                self.written += len(batch)
+                self.batches += 1
+        except SinkUnavailable:
+            # Already reported by the sink when it went down; just count the loss
+            with self.stats_lock:
+                self.failed += len(batch)
+        except Exception as e:
+            with self.stats_lock:
+                self.failed += len(batch)
+            self.logger.error(f"Sink '{self.name}' failed to write {len(batch)} event(s): {e}")
+
+    def _run(self):
+        """Worker loop that drains the queue in batches."""
+        try:
+            self.open()
+        except SinkUnavailable:
+            # Already reported; write_batch retries after the backoff
+            pass
+        except Exception as e:
+            self.logger.error(f"Sink '{self.name}' failed to open: {e}")
+
+        while self.running:
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+        # Write whatever is still queued before shutting down
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._take())
+                except queue.Empty:
+                    break
+            if not batch:
+                break
+            self._flush(batch)
+
+        try:
+            self.close()
+        except Exception as e:
+            self.logger.error(f"Sink '{self.name}' failed to close: {e}")
+
+    def start(self):
+        """Start the sink worker thread."""
+        if self.running:
+            return
+
+        self.running = True
+        self.started_at = time.monotonic()
+        self.thread = threading.Thread(target=self._run, name=f"sink-{self.name}", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Sink '{self.name}' started")
+
+    def stop(self):
+        """Stop the sink worker thread, flushing queued events."""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+        self.logger.info(f"Sink '{self.name}' stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the sink's counters."""
+        with self.stats_lock:
+            elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+            return {
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'batches': self.batches,
+                'queued': self.queue.qsize(),
+                'queued_bytes': self.queued_bytes,
+                'events_per_sec': self.written / elapsed if elapsed > 0 else 0.0,
+            }
+
+class FileSpoolSink(ClipboardSink):
+    def __init__(self, spool_file: str, max_file_bytes: int = 64 * 1024 * 1024,
+                 backup_count: int = 3, **kwargs):
+        """
+        Sink that appends events to a local JSON-lines spool file.
+
+        The spool is rotated like a log file: once it would grow past
+        max_file_bytes it is renamed to spool_file.1, older files move up
+        and the oldest beyond backup_count is discarded.
+
+        Args:
+            spool_file: Path of the spool file. It must not be shared with
+                        another process, or rotation fails and lines interleave.
+            max_file_bytes: Size at which the spool is rotated
+            backup_count: Number of rotated spool files kept
+        """
+        super().__init__(kwargs.pop('name', 'spool'), **kwargs)
+        self.spool_file = spool_file
+        self.max_file_bytes = max_file_bytes
+        self.backup_count = backup_count
+        self.file = None
+
+    def open(self):
+        self._check_retry(self.spool_file)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.spool_file)), exist_ok=True)
+            self.file = open(self.spool_file, 'ab')
+        except OSError as e:
+            self._unavailable(self.spool_file, e)
+        self._available(self.spool_file)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def _rotate(self):
+        """Move the spool to spool_file.1, shifting older files up and dropping the oldest."""
+        self.close()
+        try:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = f"{self.spool_file}.{i}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.spool_file}.{i + 1}")
+            if self.backup_count > 0:
+                os.replace(self.spool_file, f"{self.spool_file}.1")
+            else:
+                os.remove(self.spool_file)
+        except OSError as e:
+            self._unavailable(self.spool_file, e)
+        self.open()
+
+    def write_batch(self, events: List[Dict[str, Any]]):
+        if self.file is None:
+            self.open()
+        data = ''.join(json.dumps(event) + '\n' for event in events).encode('utf-8')
+        size = self.file.tell()
+        if size > 0 and size + len(data) > self.max_file_bytes:
+            self._rotate()
+        self.file.write(data)
+        self.file.flush()
+
+class NamedPipeSink(ClipboardSink):
+    def __init__(self, pipe_name: str, **kwargs):
+        """
+        Sink that writes JSON-lines events to a named pipe, e.g. the one
+        served by the clipboard-history service.
+
+        The pipe is connected lazily and reconnected with backoff when the
+        reader goes away.
+
+        Args:
+            pipe_name: Pipe name, with or without the \\\\.\\pipe\\ prefix
+        """
+        super().__init__(kwargs.pop('name', 'pipe'), **kwargs)
+        if not pipe_name.startswith('\\\\.\\pipe\\'):
+            pipe_name = '\\\\.\\pipe\\' + pipe_name
+        self.pipe_name = pipe_name
+        self.handle = None
+
+    def _connect(self):
+        self._check_retry(self.pipe_name)
+        try:
+            self.handle = win32file.CreateFile(
+                self.pipe_name,
+                win32file.GENERIC_WRITE,
+                0,
+                None,
+                win32file.OPEN_EXISTING,
+                0,
+                None
+            )
+        except pywintypes.error as e:
+            self._unavailable(self.pipe_name, e)
+        self._available(self.pipe_name)
+
+    def close(self):
+        if self.handle is not None:
+            try:
+                win32file.CloseHandle(self.handle)
+            except pywintypes.error:
+                pass
+            self.handle = None
+
+    def write_batch(self, events: List[Dict[str, Any]]):
+        if self.handle is None:
+            self._connect()
+        data = ''.join(json.dumps(event) + '\n' for event in events).encode('utf-8')
+        try:
+            win32file.WriteFile(self.handle, data)
+        except pywintypes.error as e:
+            # The reader went away; reconnect after a backoff
+            self._unavailable(self.pipe_name, e)
+
+class AuditLogSink(ClipboardSink):
+    def __init__(self, audit_file: str, **kwargs):
+        """
+        Sink that records an audit trail of clipboard events.
+
+        Only metadata and a SHA-256 digest of the content are written, never
+        the content itself. When the dispatcher redacts, the digest is of the
+        redacted text shared with the other sinks, so no extra scan is needed.
+
+        Args:
+            audit_file: Path of the audit log file
+        """
+        super().__init__(kwargs.pop('name', 'audit'), **kwargs)
+        self.audit_file = audit_file
+        self.file = None
+
+    def open(self):
+        self._check_retry(self.audit_file)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.audit_file)), exist_ok=True)
+            self.file = open(self.audit_file, 'a', encoding='utf-8')
+        except OSError as e:
+            self._unavailable(self.audit_file, e)
+        self._available(self.audit_file)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def write_batch(self, events: List[Dict[str, Any]]):
+        if self.file is None:
+            self.open()
+        lines = []
+        for event in events:
+            content = event.get('content', '')
+            digest = hashlib.sha256(content.encode('utf-8', 'replace')).hexdigest()
+            timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event.get('timestamp', 0)))
+            lines.append(f"{timestamp} length={len(content)} sha256={digest}\n")
+        self.file.write(''.join(lines))
+        self.file.flush()
+
+class SinkDispatcher:
+    def __init__(self, sinks: Optional[List[ClipboardSink]] = None, redactor: Optional[Redactor] = None):
+        """
+        Fan clipboard events out to a set of independent sinks.
+
+        Args:
+            sinks: Initial list of sinks
+            redactor: Optional redactor applied to event content before any sink
+                      writes it. Each event is redacted at most once, on a sink
+                      thread, and the result is shared between sinks.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.sinks = list(sinks or [])
+        self.redactor = redactor
+
+    def add_sink(self, sink: ClipboardSink):
+        """Register an additional sink."""
+        self.sinks.append(sink)
+
+    def publish(self, event: Dict[str, Any]):
+        """Hand an event to every sink. Never blocks on a slow sink."""
+        if self.redactor is not None and event.get('content'):
+            event = dict(event)
+            event['content'] = RedactedContent(event['content'], self.redactor)
+        for sink in self.sinks:
+            sink.submit(event)
+
+    def start(self):
+        """Start all sinks."""
+        for sink in self.sinks:
+            try:
+                sink.start()
+            except Exception as e:
+                self.logger.error(f"Failed to start sink '{sink.name}': {e}")
+
+    def stop(self):
+        """Stop all sinks."""
+        for sink in self.sinks:
+            try:
+                sink.stop()
+            except Exception as e:
+                self.logger.error(f"Failed to stop sink '{sink.name}': {e}")
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-sink statistics keyed by sink name."""
+        return {sink.name: sink.get_stats() for sink in self.sinks}
@@ -0,0 +1,169 @@
+"""
+Soak test harness.
+
+Drives millions of simulated clipboard events through the same code path as
+the application (change detection, RDP attribution, redaction, tray log and
+sinks) without touching the real clipboard, and fails if memory, handle or
+thread counts aren't flat once the warm-up is over.
+
+Attribution goes through the real foreground-window process lookup, so the
+OpenProcess/CloseHandle pair runs for every changed event. Run it from an
+interactive desktop session so there is a foreground window to look up.
+
+Usage:
+    python -m clipboard_refresher.soak --events 2000000
+"""
+
+import argparse
+import contextlib
+import gc
+import logging
+import os
+import random
+import sys
+import time
+from typing import Iterator, Tuple, List, Dict, Any
+from .clipboard_monitor import ClipboardMonitor
+from .tray_icon import TrayIcon
+from .sinks import ClipboardSink, SinkDispatcher
+from .diagnostics import MemoryDiagnostics
+from .main import ClipboardRefresher
+
+# Payloads mixed into the simulated events, including ones the redactor should catch
+SAMPLE_PAYLOADS = [
+    "SELECT * FROM customers WHERE id = {i};",
+    "password={i}hunter2",
+    "ssh deploy@host-{i}.example.com",
+    "Card on file: 4111 1111 1111 1111 (ref {i})",
+    "Authorization: Bearer abcdefghijklmnop{i}qrstuvwxyz",
+    "Notes for ticket #{i}",
+]
+
+class NullSink(ClipboardSink):
+    """Sink that discards events, used to exercise the queue and worker thread."""
+
+    def write_batch(self, events: List[Dict[str, Any]]):
+        pass
+
+class SoakRefresher(ClipboardRefresher):
+    """Application that skips the re-copy so the real clipboard is left alone."""
+
+    def _recopy_to_clipboard(self, content: str):
+        pass
+
+def generate_events(count: int, seed: int = 0) -> Iterator[Tuple[str, str]]:
+    """Yield (content, process name) pairs for simulated clipboard changes."""
+    rng = random.Random(seed)
+    previous = ""
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.05:
+            # rdpclip re-syncing the same content
+            content = previous
+        elif roll < 0.06:
+            # Occasional large paste
+            content = f"{i}:" + "x" * rng.randint(16 * 1024, 256 * 1024)
+        else:
+            content = rng.choice(SAMPLE_PAYLOADS).format(i=i)
+        process_name = 'rdpclip.exe' if rng.random() < 0.7 else 'notepad.exe'
+        previous = content
+        yield content, process_name
+
+def attribute(monitor: ClipboardMonitor, process_name: str) -> str:
+    """
+    Run the real process lookup for its handle usage, but return the
+    simulated process name so the RDP check follows the generated mix.
+    """
+    monitor._get_foreground_window_process()
+    return process_name
+
+def wait_for_sinks(dispatcher: SinkDispatcher, timeout: float = 10.0):
+    """Wait for the sink queues to drain so queued events don't count as growth."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(sink.queue.empty() for sink in dispatcher.sinks):
+            return
+        time.sleep(0.01)
+
+def run_soak(events: int, warmup: int, samples: int, max_growth: int, seed: int = 0) -> bool:
+    """
+    Run the soak test.
+
+    Returns:
+        True if memory, handles and threads stayed flat after the warm-up.
+    """
+    logger = logging.getLogger(__name__)
+
+    app = SoakRefresher()
+    app.tray_icon = TrayIcon(on_quit=lambda: None, on_toggle=lambda enabled: None)
+    app.sink_dispatcher = SinkDispatcher([
+        NullSink('null'),
+    ], redactor=app.redactor)
+    app.sink_dispatcher.start()
+    monitor = ClipboardMonitor(on_rdp_clipboard_update=app.on_clipboard_update)
+
+    alerts = []
+    diagnostics = MemoryDiagnostics(
+        growth_threshold=max_growth,
+        handle_threshold=50,
+        thread_threshold=1,
+        on_alert=alerts.append
+    )
+
+    sample_every = max(1, (events - warmup) // samples)
+    start = time.monotonic()
+
+    try:
+        for i, (content, process_name) in enumerate(generate_events(events, seed)):
+            if i == warmup:
+                wait_for_sinks(app.sink_dispatcher)
+                gc.collect()
+                diagnostics.reset_baseline()
+                logger.warning(f"Warm-up complete after {warmup} events, baseline taken")
+
+            monitor._process_clipboard_change(content, lambda: attribute(monitor, process_name))
+
+            if i > warmup and (i - warmup) % sample_every == 0:
+                wait_for_sinks(app.sink_dispatcher)
+                gc.collect()
+                sample = diagnostics.take_sample()
+                logger.warning(
+                    f"{i} events, {i / (time.monotonic() - start):.0f}/s, "
+                    f"growth={sample['memory_growth']} B, threads={sample['threads']}, handles={sample['handles']}"
+                )
+
+        wait_for_sinks(app.sink_dispatcher)
+        gc.collect()
+        sample = diagnostics.take_sample()
+    finally:
+        app.sink_dispatcher.stop()
+        diagnostics.stop()
+
+    logger.warning(f"Sink stats: {app.sink_dispatcher.get_stats()}")
+    logger.warning(f"Redaction stats: {app.redactor.get_stats()}")
+    logger.warning(f"Final growth since baseline: {sample['memory_growth']} B")
+    for alert in alerts:
+        logger.error(f"Soak alert: {alert}")
+    return not alerts
+
+def main():
+    parser = argparse.ArgumentParser(description="Clipboard Refresher soak test")
+    parser.add_argument('--events', type=int, default=1000000, help="Number of simulated clipboard events")
+    parser.add_argument('--warmup', type=int, default=50000, help="Events to run before taking the baseline")
+    parser.add_argument('--samples', type=int, default=20, help="Number of samples taken after the warm-up")
+    parser.add_argument('--max-growth', type=int, default=1024 * 1024,
+                        help="Traced memory growth in bytes that fails the run")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the simulated events")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # The tray log echoes every message to stdout
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        passed = run_soak(args.events, min(args.warmup, args.events), args.samples, args.max_growth, args.seed)
+
+    print("Soak test passed: memory is flat" if passed else "Soak test FAILED: growth detected")
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional, Dict, List, Any
+
+# Number of spans kept in the ring buffer before the oldest are overwritten
+DEFAULT_CAPACITY = 64 * 1024
+
+class Tracer:
+    def __init__(self, enabled: bool = False, capacity: int = DEFAULT_CAPACITY):
+        """
+        Initialize the tracer.
+
+        Spans are (event ID, stage, start, end, thread) tuples with monotonic
+        nanosecond timestamps, stored in a preallocated ring buffer. When
+        tracing is disabled, new_event() returns None and every other call
+        returns immediately.
+
+        Args:
+            enabled: Whether spans are recorded
+            capacity: Number of spans kept in the ring buffer
+        """
+        self.logger = logging.getLogger(__name__)
+        self.enabled = enabled
+        self.capacity = capacity
+        self.buffer = [None] * capacity if enabled else []
+        # next() on itertools.count is atomic under the GIL, so no lock is needed on the hot path
+        self.event_ids = itertools.count(1)
+        self.span_index = itertools.count()
+        self.local = threading.local()
+
+    def clock(self) -> int:
+        """Return a monotonic timestamp in nanoseconds, or 0 when tracing is disabled."""
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def new_event(self) -> Optional[int]:
+        """Allocate an ID for a new clipboard event, or None when tracing is disabled."""
+        return next(self.event_ids) if self.enabled else None
+
+    def record(self, event_id: Optional[int], stage: str, start: int, end: int):
+        """Record a span with explicit start and end timestamps."""
+        if event_id is None:
+            return
+        self.buffer[next(self.span_index) % self.capacity] = (
+            event_id, stage, start, end, threading.get_ident()
+        )
+
+    def span(self, event_id: Optional[int], stage: str, start: int) -> int:
+        """
+        Record a span from start until now.
+
+        Returns:
+            The end timestamp, to be used as the start of the next stage.
+        """
+        if event_id is None:
+            return 0
+        end = time.perf_counter_ns()
+        self.record(event_id, stage, start, end)
+        return end
+
+    def set_current(self, event_id: Optional[int]):
+        """Set the event being handled on this thread, so callbacks can add their own spans."""
+        self.local.event_id = event_id
+
+    def get_current(self) -> Optional[int]:
+        """Get the event being handled on this thread."""
+        return getattr(self.local, 'event_id', None)
+
+    def get_spans(self) -> List[tuple]:
+        """Return the spans in the ring buffer, oldest first."""
+        spans = [span for span in self.buffer if span is not None]
+        spans.sort(key=lambda span: span[2])
+        return spans
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Convert the recorded spans to Chrome trace-event format."""
+        pid = os.getpid()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        events = []
+        seen_threads = set()
+
+        for event_id, stage, start, end, tid in self.get_spans():
+            if tid not in seen_threads:
+                seen_threads.add(tid)
+                events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                    'args': {'name': thread_names.get(tid, str(tid))},
+                })
+            events.append({
+                'name': stage,
+                'cat': 'clipboard',
+                'ph': 'X',
+                'ts': start / 1000,
+                'dur': (end - start) / 1000,
+                'pid': pid,
+                'tid': tid,
+                'args': {'event_id': event_id},
+            })
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path: str) -> int:
+        """
+        Write the recorded spans to a Chrome trace-event JSON file.
+
+        Returns:
+            The number of spans written.
+        """
+        trace = self.to_chrome_trace()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f)
+        count = sum(1 for event in trace['traceEvents'] if event['ph'] == 'X')
+        self.logger.info(f"Wrote {count} trace spans to {path}")
+        return count
@@ -2,6 +2,7 @@ import pystray
 from PIL import Image, ImageDraw
 import logging
 import threading
+from collections import deque
 import io
 import sys
 import tkinter as tk
@@ -9,20 +10,27 @@ from tkinter import scrolledtext
 from typing import Optional, Callable, Any
 
 class TrayIcon:
-    def __init__(self, on_quit: Callable[[], None], on_toggle: Callable[[bool], None]):
+    def __init__(self, on_quit: Callable[[], None], on_toggle: Callable[[bool], None],
+                 on_show_stats: Optional[Callable[[], None]] = None,
+                 on_dump_trace: Optional[Callable[[], None]] = None):
         """
         Initialize the system tray icon.
         
         Args:
             on_quit: Callback function to call when the user selects Exit
             on_toggle: Callback function to call when the user toggles monitoring
+            on_show_stats: Optional callback function to call when the user selects Show Stats
+            on_dump_trace: Optional callback function to call when the user selects Dump Trace
         """
         self.logger = logging.getLogger(__name__)
         self.on_quit = on_quit
         self.on_toggle = on_toggle
+        self.on_show_stats = on_show_stats
+        self.on_dump_trace = on_dump_trace
         self.enabled = True
-        self.log_messages = []
         self.max_log_entries = 100
+        # Bounded so old entries fall off without re-slicing the list on every message
+        self.log_messages = deque(maxlen=self.max_log_entries)
         self.icon = None
         self.menu = None
         self.log_lock = threading.Lock()
@@ -66,12 +74,20 @@ class TrayIcon:
             self._toggle_monitoring
         )
         
-        self.menu = pystray.Menu(
+        items = [
             self.toggle_item,
             pystray.MenuItem('Show Log', self._show_log),
+        ]
+        if self.on_show_stats:
+            items.append(pystray.MenuItem('Show Stats', self._show_stats))
+        if self.on_dump_trace:
+            items.append(pystray.MenuItem('Dump Trace', self._dump_trace))
+        items.extend([
             pystray.Menu.SEPARATOR,
             pystray.MenuItem('Exit', self._on_quit)
-        )
+        ])
+        
+        self.menu = pystray.Menu(*items)
         
         # Update the icon menu if it exists
         if hasattr(self, 'icon') and self.icon is not None:
@@ -141,6 +157,21 @@ class TrayIcon:
             self._log_window.lift()
             self._log_window.focus_force()
     
+    def _show_stats(self, icon, item):
+        """Write runtime statistics to the log and show the log window."""
+        try:
+            self.on_show_stats()
+        except Exception as e:
+            self.logger.error(f"Error collecting stats: {e}")
+        self._show_log(icon, item)
+    
+    def _dump_trace(self, icon, item):
+        """Write the latency trace to disk."""
+        try:
+            self.on_dump_trace()
+        except Exception as e:
+            self.logger.error(f"Error dumping trace: {e}")
+    
     def _close_log_window(self):
         """Safely close the log window."""
         if hasattr(self, '_log_window') and self._log_window.winfo_exists():
@@ -150,7 +181,7 @@ class TrayIcon:
     def _clear_logs(self):
         """Clear all log messages."""
         with self.log_lock:
-            self.log_messages = []
+            self.log_messages.clear()
         self._update_log_window()
 
     def _on_quit(self, icon, item):
@@ -169,10 +200,8 @@ class TrayIcon:
         log_entry = (timestamp, level, message)
         
         with self.log_lock:
+            # The deque keeps only the most recent log messages
             self.log_messages.append(log_entry)
-            # Keep only the most recent log messages
-            if len(self.log_messages) > self.max_log_entries:
-                self.log_messages = self.log_messages[-self.max_log_entries:]
         
         # Also log to the console
         if level == "ERROR":
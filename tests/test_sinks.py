@@ -0,0 +1,237 @@
+import logging
+import sys
+import types
+import pytest
+
+try:
+    import pywintypes
+    import win32file
+except ImportError:
+    # Only the named pipe sink uses pywin32, and these tests replace its calls
+    pywintypes = types.ModuleType('pywintypes')
+    pywintypes.error = type('error', (Exception,), {})
+    win32file = types.ModuleType('win32file')
+    sys.modules.update(pywintypes=pywintypes, win32file=win32file)
+
+from clipboard_refresher import sinks
+from clipboard_refresher.redaction import Redactor
+from clipboard_refresher.sinks import (
+    ClipboardSink, FileSpoolSink, NamedPipeSink, SinkDispatcher, SinkUnavailable,
+    DROP_NEWEST, DROP_OLDEST,
+)
+
+class ListSink(ClipboardSink):
+    def __init__(self, name='list', **kwargs):
+        super().__init__(name, **kwargs)
+        self.events = []
+
+    def write_batch(self, events):
+        self.events.extend(events)
+
+class FailingSink(ClipboardSink):
+    def __init__(self, error, **kwargs):
+        super().__init__('failing', **kwargs)
+        self.error = error
+
+    def write_batch(self, events):
+        raise self.error
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sinks.time, 'monotonic', clock)
+    return clock
+
+def queued(sink):
+    return [event['content'] for event in list(sink.queue.queue)]
+
+def test_drop_oldest_keeps_newest_events():
+    sink = ListSink(max_queue=3, drop_policy=DROP_OLDEST)
+    results = [sink.submit({'content': str(i)}) for i in range(5)]
+    assert results == [True] * 5
+    assert queued(sink) == ['2', '3', '4']
+    assert sink.get_stats()['dropped'] == 2
+
+def test_drop_newest_keeps_oldest_events():
+    sink = ListSink(max_queue=3, drop_policy=DROP_NEWEST)
+    results = [sink.submit({'content': str(i)}) for i in range(5)]
+    assert results == [True, True, True, False, False]
+    assert queued(sink) == ['0', '1', '2']
+    assert sink.get_stats()['dropped'] == 2
+
+def test_unknown_drop_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ListSink(drop_policy='drop_random')
+
+def test_byte_budget_drops_oldest_to_make_room():
+    size = sys.getsizeof('x' * 1000)
+    sink = ListSink(max_bytes=size * 3, drop_policy=DROP_OLDEST)
+    for i in range(5):
+        sink.submit({'content': str(i) * 1000})
+    assert [content[0] for content in queued(sink)] == ['2', '3', '4']
+    assert sink.get_stats()['queued_bytes'] == size * 3
+    assert sink.get_stats()['dropped'] == 2
+
+def test_byte_budget_drops_newest():
+    size = sys.getsizeof('x' * 1000)
+    sink = ListSink(max_bytes=size * 2, drop_policy=DROP_NEWEST)
+    results = [sink.submit({'content': str(i) * 1000}) for i in range(3)]
+    assert results == [True, True, False]
+    assert sink.get_stats()['queued_bytes'] == size * 2
+
+def test_event_larger_than_budget_is_dropped_without_evicting():
+    sink = ListSink(max_bytes=sys.getsizeof('x' * 1000), drop_policy=DROP_OLDEST)
+    assert sink.submit({'content': 'small'})
+    assert not sink.submit({'content': 'x' * 10000})
+    assert queued(sink) == ['small']
+    assert sink.get_stats()['dropped'] == 1
+
+def test_taking_events_releases_their_bytes():
+    sink = ListSink()
+    for i in range(10):
+        sink.submit({'content': 'x' * 1000})
+    assert sink.get_stats()['queued_bytes'] > 0
+    sink._flush(sink._next_batch())
+    assert sink.get_stats()['queued_bytes'] == 0
+    assert sink.get_stats()['written'] == 10
+
+def test_unavailable_sink_counts_failures_without_logging(caplog):
+    sink = FailingSink(SinkUnavailable('down'))
+    with caplog.at_level(logging.ERROR, logger=sinks.__name__):
+        sink._flush([{'content': 'a'}, {'content': 'b'}])
+    assert sink.get_stats()['failed'] == 2
+    assert caplog.records == []
+
+def test_write_error_counts_failures_and_logs(caplog):
+    sink = FailingSink(OSError('disk full'))
+    with caplog.at_level(logging.ERROR, logger=sinks.__name__):
+        sink._flush([{'content': 'a'}])
+    assert sink.get_stats()['failed'] == 1
+    assert 'disk full' in caplog.text
+
+def test_worker_writes_everything_queued_before_stop():
+    sink = ListSink(batch_size=7, flush_interval=0.01)
+    sink.start()
+    for i in range(100):
+        sink.submit({'content': str(i)})
+    sink.stop()
+    assert [event['content'] for event in sink.events] == [str(i) for i in range(100)]
+
+def test_dispatcher_redacts_once_for_all_sinks(monkeypatch):
+    redactor = Redactor()
+    calls = []
+    redact = redactor.redact
+    monkeypatch.setattr(redactor, 'redact', lambda content: calls.append(content) or redact(content))
+    first, second = ListSink('first'), ListSink('second')
+    dispatcher = SinkDispatcher([first, second], redactor=redactor)
+    dispatcher.publish({'timestamp': 1.0, 'content': 'password=hunter2'})
+
+    for sink in (first, second):
+        sink._flush(sink._next_batch())
+        assert sink.events == [{'timestamp': 1.0, 'content': '[REDACTED:password]'}]
+    assert len(calls) == 1
+
+@pytest.fixture
+def pipe(monkeypatch, clock):
+    """A pipe sink whose CreateFile fails until pipe.available is set."""
+    sink = NamedPipeSink('clipboard_history', min_retry=1.0, max_retry=4.0)
+    sink.available = False
+    sink.attempts = 0
+    sink.writes = []
+
+    def create_file(*args):
+        sink.attempts += 1
+        if not sink.available:
+            raise pywintypes.error(2, 'CreateFile', 'The system cannot find the file specified.')
+        return 'handle'
+
+    monkeypatch.setattr(sinks.win32file, 'CreateFile', create_file, raising=False)
+    monkeypatch.setattr(sinks.win32file, 'WriteFile', lambda handle, data: sink.writes.append(data), raising=False)
+    monkeypatch.setattr(sinks.win32file, 'CloseHandle', lambda handle: None, raising=False)
+    for constant in ('GENERIC_WRITE', 'OPEN_EXISTING'):
+        monkeypatch.setattr(sinks.win32file, constant, 0, raising=False)
+    return sink
+
+def test_pipe_name_gets_prefix(pipe):
+    assert pipe.pipe_name == '\\\\.\\pipe\\clipboard_history'
+
+def test_pipe_backs_off_between_reconnects(pipe, clock):
+    with pytest.raises(SinkUnavailable):
+        pipe.write_batch([{'content': 'a'}])
+    assert pipe.attempts == 1
+
+    # Batches before the retry is due don't touch the pipe
+    clock.now += 0.5
+    with pytest.raises(SinkUnavailable):
+        pipe.write_batch([{'content': 'b'}])
+    assert pipe.attempts == 1
+
+    # The delay doubles after each failed attempt, up to max_retry
+    delays = []
+    for _ in range(4):
+        clock.now = pipe.retry_at
+        retry_from = clock.now
+        with pytest.raises(SinkUnavailable):
+            pipe.write_batch([{'content': 'c'}])
+        delays.append(pipe.retry_at - retry_from)
+    assert delays == [2.0, 4.0, 4.0, 4.0]
+    assert pipe.attempts == 5
+
+def test_pipe_outage_logs_one_warning(pipe, clock, caplog):
+    with caplog.at_level(logging.INFO, logger=sinks.__name__):
+        for _ in range(5):
+            clock.now = pipe.retry_at
+            with pytest.raises(SinkUnavailable):
+                pipe.write_batch([{'content': 'a'}])
+        assert len([r for r in caplog.records if r.levelno == logging.WARNING]) == 1
+
+        pipe.available = True
+        clock.now = pipe.retry_at
+        pipe.write_batch([{'content': 'b'}])
+    assert 'reconnected' in caplog.records[-1].getMessage()
+    assert pipe.writes == [b'{"content": "b"}\n']
+    assert pipe.retry_delay == pipe.min_retry
+
+def test_pipe_write_error_schedules_reconnect(pipe, clock, monkeypatch):
+    pipe.available = True
+    pipe.write_batch([{'content': 'a'}])
+
+    def broken_pipe(handle, data):
+        raise pywintypes.error(232, 'WriteFile', 'The pipe is being closed.')
+
+    monkeypatch.setattr(sinks.win32file, 'WriteFile', broken_pipe, raising=False)
+    with pytest.raises(SinkUnavailable):
+        pipe.write_batch([{'content': 'b'}])
+    assert pipe.handle is None
+    assert pipe.retry_at == clock.now + pipe.min_retry
+
+def test_spool_rotates_at_size_limit(tmp_path):
+    path = tmp_path / 'spool.jsonl'
+    line = len('{"content": "xxxxxxxxxx"}\n')
+    sink = FileSpoolSink(str(path), max_file_bytes=line * 3, backup_count=2)
+    for _ in range(10):
+        sink.write_batch([{'content': 'x' * 10}])
+    sink.close()
+
+    assert path.stat().st_size == line
+    assert (tmp_path / 'spool.jsonl.1').stat().st_size == line * 3
+    assert (tmp_path / 'spool.jsonl.2').stat().st_size == line * 3
+    assert not (tmp_path / 'spool.jsonl.3').exists()
+
+def test_spool_open_failure_backs_off(tmp_path, clock, caplog):
+    # A file where the spool directory should be makes every open fail
+    (tmp_path / 'blocked').write_text('')
+    sink = FileSpoolSink(str(tmp_path / 'blocked' / 'spool.jsonl'))
+    with caplog.at_level(logging.WARNING, logger=sinks.__name__):
+        for _ in range(10):
+            with pytest.raises(SinkUnavailable):
+                sink.write_batch([{'content': 'a'}])
+    assert len(caplog.records) == 1
+    assert sink.retry_at == clock.now + sink.min_retry
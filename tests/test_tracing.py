@@ -0,0 +1,85 @@
+import json
+import threading
+from clipboard_refresher.tracing import Tracer
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    assert tracer.new_event() is None
+    assert tracer.clock() == 0
+    assert tracer.span(None, 'stage', 0) == 0
+    tracer.record(None, 'stage', 0, 10)
+    assert tracer.get_spans() == []
+    assert tracer.to_chrome_trace()['traceEvents'] == []
+
+def test_event_ids_are_unique():
+    tracer = Tracer(enabled=True)
+    assert [tracer.new_event() for _ in range(3)] == [1, 2, 3]
+
+def test_span_records_until_now_and_returns_end():
+    tracer = Tracer(enabled=True)
+    event_id = tracer.new_event()
+    start = tracer.clock()
+    end = tracer.span(event_id, 'stage', start)
+    assert end >= start
+    assert tracer.get_spans() == [(event_id, 'stage', start, end, threading.get_ident())]
+
+def test_ring_buffer_keeps_latest_spans_oldest_first():
+    tracer = Tracer(enabled=True, capacity=4)
+    for i in range(10):
+        tracer.record(1, f'stage{i}', i * 100, i * 100 + 50)
+    assert [span[1] for span in tracer.get_spans()] == ['stage6', 'stage7', 'stage8', 'stage9']
+
+def test_current_event_is_per_thread():
+    tracer = Tracer(enabled=True)
+    tracer.set_current(5)
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(tracer.get_current()))
+    thread.start()
+    thread.join()
+    assert tracer.get_current() == 5
+    assert seen == [None]
+
+def test_chrome_trace_uses_microseconds_and_names_threads():
+    tracer = Tracer(enabled=True)
+    tracer.record(7, 'fingerprint', 2_000_000, 2_500_000)
+    tracer.record(7, 'callback', 2_500_000, 4_000_000)
+
+    recorded = threading.Event()
+    done = threading.Event()
+
+    def worker():
+        tracer.record(8, 'sink_publish', 3_000_000, 3_001_000)
+        recorded.set()
+        done.wait()
+
+    thread = threading.Thread(target=worker, name='sink-worker')
+    thread.start()
+    recorded.wait()
+    try:
+        events = tracer.to_chrome_trace()['traceEvents']
+    finally:
+        done.set()
+        thread.join()
+
+    metadata = [event for event in events if event['ph'] == 'M']
+    spans = [event for event in events if event['ph'] == 'X']
+    assert [(event['tid'], event['args']['name']) for event in metadata] == [
+        (threading.get_ident(), threading.current_thread().name),
+        (thread.ident, 'sink-worker'),
+    ]
+    assert [(event['name'], event['ts'], event['dur']) for event in spans] == [
+        ('fingerprint', 2000.0, 500.0),
+        ('callback', 2500.0, 1500.0),
+        ('sink_publish', 3000.0, 1.0),
+    ]
+    assert spans[0]['args'] == {'event_id': 7}
+    assert spans[2]['tid'] == thread.ident
+
+def test_dump_writes_chrome_trace_json(tmp_path):
+    tracer = Tracer(enabled=True)
+    tracer.record(1, 'stage', 1000, 2000)
+    path = tmp_path / 'trace' / 'trace.json'
+    assert tracer.dump(str(path)) == 1
+    trace = json.loads(path.read_text(encoding='utf-8'))
+    assert trace['displayTimeUnit'] == 'ms'
+    assert [event['name'] for event in trace['traceEvents']] == ['thread_name', 'stage']